@@ -0,0 +1,66 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+CACHE_DIR = ".cache"
+
+class FileCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        filename = hashlib.md5(key.encode("utf-8")).hexdigest() + ".pkl"
+        return os.path.join(self.cache_dir, filename)
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, ttl):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                self._record(False)
+                return None
+        except OSError:
+            self._record(False)
+            return None
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except Exception:
+            self._record(False)
+            self._remove(path)
+            return None
+        self._record(True)
+        return value
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def set(self, key, value):
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                pickle.dump(value, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if tmp_path is not None:
+                self._remove(tmp_path)
+
+    def stats(self):
+        return f"Cache: {self.hits} hits, {self.misses} misses"
@@ -1,7 +1,10 @@
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 
+from cache import FileCache
+
 COMPANY_TIERS = {
     "Tier 1: Stalwarts": {
         "tickers": {"MSFT", "GOOGL", "GOOG", "V", "MA", "AAPL", "ADBE"},
@@ -21,96 +24,197 @@ COMPANY_TIERS = {
     }
 }
 
+DEFAULT_ASSUMPTIONS = {"short_term_growth": 0.05, "discount_rate": 0.10, "perpetual_growth": 0.02}
+
+NEGATIVE_FCF_VERDICT = "Negative FCF"
+
+FUNDAMENTAL_FIELDS = ("Current Price", "P/E Ratio", "FCF", "Debt", "Cash", "Shares")
+
+YEARS_TO_PROJECT = 5
+YEARS = np.arange(1, YEARS_TO_PROJECT + 1)
+
+def get_pv_multiplier(assumptions):
+    short_term_growth = assumptions['short_term_growth']
+    discount_rate = assumptions['discount_rate']
+    perpetual_growth = assumptions['perpetual_growth']
+    if discount_rate <= perpetual_growth:
+        return np.nan
+    growth = (1 + short_term_growth) ** YEARS
+    disc = (1 + discount_rate) ** YEARS
+    terminal_multiplier = growth[-1] * (1 + perpetual_growth) / ((discount_rate - perpetual_growth) * disc[-1])
+    return float((growth / disc).sum() + terminal_multiplier)
+
+for tier_info in COMPANY_TIERS.values():
+    tier_info["assumptions"]["_pv_multiplier"] = get_pv_multiplier(tier_info["assumptions"])
+DEFAULT_ASSUMPTIONS["_pv_multiplier"] = get_pv_multiplier(DEFAULT_ASSUMPTIONS)
+
+_TIER_INDEX = {
+    ticker: (tier_name, tier_info["assumptions"])
+    for tier_name, tier_info in COMPANY_TIERS.items()
+    for ticker in tier_info["tickers"]
+}
+
 WATCHLIST = [
     "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "BRK-B", "V", "MA",
     "JNJ", "PG", "COST", "WMT", "ADBE", "CRM", "NFLX", "PYPL", "SQ", "UBER", "MELI"
 ]
 
+MAX_WORKERS = 16
+
+OPERATING_CASH_LABELS = ('Operating Cash Flow', 'Total Cash From Operating Activities')
+CAPEX_LABELS = ('Capital Expenditure', 'Capital Expenditures')
+
+INFO_TTL = 24 * 60 * 60
+CASHFLOW_TTL = 90 * 24 * 60 * 60
+
+cache = FileCache()
+
 def get_company_tier(ticker):
-    for tier_name, tier_info in COMPANY_TIERS.items():
-        if ticker in tier_info["tickers"]:
-            return tier_name, tier_info["assumptions"]
-    return "Uncategorized", {"short_term_growth": 0.05, "discount_rate": 0.10, "perpetual_growth": 0.02}
+    return _TIER_INDEX.get(ticker, ("Uncategorized", DEFAULT_ASSUMPTIONS))
+
+def cached_info(ticker, stock):
+    key = f"{ticker}:info"
+    info = cache.get(key, INFO_TTL)
+    if info is None:
+        info = stock.info
+        if info:
+            cache.set(key, info)
+    return info
+
+def cached_cashflow(ticker, stock):
+    key = f"{ticker}:cashflow"
+    cashflow = cache.get(key, CASHFLOW_TTL)
+    if cashflow is None:
+        cashflow = stock.cashflow
+        if not cashflow.empty:
+            cache.set(key, cashflow)
+    return cashflow
+
+def find_row(rows, labels):
+    for label in labels:
+        if label in rows:
+            return rows.get_loc(label)
+    return None
+
+def dcf_kernel(fcf, debt, cash, shares, pv_multiplier):
+    enterprise_value = fcf * pv_multiplier
+    return (enterprise_value - debt + cash) / shares
+
+def fetch_fundamentals(ticker):
+    import yfinance as yf
 
-def analyze_ticker(ticker):
     try:
         stock = yf.Ticker(ticker)
-        info = stock.info
-        tier_name, assumptions = get_company_tier(ticker)
         
-        cashflow = stock.cashflow
-        if 'Free Cash Flow' in cashflow.index:
-            fcf_history = cashflow.loc['Free Cash Flow']
+        cashflow = cached_cashflow(ticker, stock)
+        rows = cashflow.index
+        values = cashflow.to_numpy(dtype=float)
+        if 'Free Cash Flow' in rows:
+            fcf_values = values[rows.get_loc('Free Cash Flow')]
         else:
-            op_cash = cashflow.loc['Total Cash From Operating Activities']
-            cap_ex = cashflow.loc['Capital Expenditures']
-            fcf_history = op_cash + cap_ex
+            op_cash_row = find_row(rows, OPERATING_CASH_LABELS)
+            cap_ex_row = find_row(rows, CAPEX_LABELS)
+            if op_cash_row is None or cap_ex_row is None:
+                return {"Ticker": ticker, "Verdict": "No FCF Data"}
+            fcf_values = values[op_cash_row] + values[cap_ex_row]
             
-        fcf_last_3_years = fcf_history.dropna().head(3)
-        if fcf_last_3_years.empty:
+        fcf_last_3_years = fcf_values[~np.isnan(fcf_values)][:3]
+        if fcf_last_3_years.size == 0:
             return {"Ticker": ticker, "Verdict": "No FCF Data"}
             
-        normalized_fcf = np.mean(fcf_last_3_years)
+        normalized_fcf = fcf_last_3_years.mean()
+        if normalized_fcf <= 0:
+            return {"Ticker": ticker, "Verdict": NEGATIVE_FCF_VERDICT}
 
+        info = cached_info(ticker, stock)
         current_price = info.get('currentPrice') or info.get('regularMarketPrice')
         if not current_price:
             return {"Ticker": ticker, "Verdict": "No Price Data"}
 
-        result = {
+        return {
             "Ticker": ticker,
-            "Tier": tier_name.split(':')[1].strip(),
-            "Current Price": f"${current_price:,.2f}",
-            "P/E Ratio": info.get('trailingPE')
+            "Current Price": current_price,
+            "P/E Ratio": info.get('trailingPE'),
+            "FCF": normalized_fcf,
+            "Debt": info.get('totalDebt') or 0,
+            "Cash": info.get('totalCash') or 0,
+            "Shares": info.get('sharesOutstanding') or 0
         }
 
-        if normalized_fcf <= 0:
-            result.update({"Verdict": "Negative FCF", "Intrinsic Value": "N/A", "Margin of Safety": "N/A"})
-            return result
+    except Exception as e:
+        return {"Ticker": ticker, "Verdict": f"Error: {e}"}
 
-        short_term_growth = assumptions['short_term_growth']
-        discount_rate = assumptions['discount_rate']
-        perpetual_growth = assumptions['perpetual_growth']
-        YEARS_TO_PROJECT = 5
+def value_companies(fundamentals):
+    columns = {field: [] for field in ("Ticker", "Verdict") + FUNDAMENTAL_FIELDS}
+    for f in fundamentals:
+        columns["Ticker"].append(f["Ticker"])
+        columns["Verdict"].append(f.get("Verdict"))
+        for field in FUNDAMENTAL_FIELDS:
+            columns[field].append(f.get(field, np.nan))
 
-        projected_fcf = [normalized_fcf * (1 + short_term_growth)**i for i in range(1, YEARS_TO_PROJECT + 1)]
-        terminal_value = (projected_fcf[-1] * (1 + perpetual_growth)) / (discount_rate - perpetual_growth)
-        
-        if terminal_value < 0:
-             result.update({"Verdict": "Negative Terminal Value", "Intrinsic Value": "N/A", "Margin of Safety": "N/A"})
-             return result
+    tickers = columns["Ticker"]
+    tiers = [get_company_tier(t) for t in tickers]
+    tier_names = [name for name, _ in tiers]
+    assumptions = [a for _, a in tiers]
+    fetch_verdicts = columns["Verdict"]
 
-        discounted_fcf = [cf / (1 + discount_rate)**(i+1) for i, cf in enumerate(projected_fcf)]
-        discounted_terminal = terminal_value / (1 + discount_rate)**YEARS_TO_PROJECT
-        enterprise_value = sum(discounted_fcf) + discounted_terminal
+    fcf = np.array(columns["FCF"], dtype=float)
+    debt = np.array(columns["Debt"], dtype=float)
+    cash = np.array(columns["Cash"], dtype=float)
+    shares = np.array(columns["Shares"], dtype=float)
+    price = np.array(columns["Current Price"], dtype=float)
 
-        total_debt = info.get('totalDebt', 0)
-        cash_equiv = info.get('totalCash', 0)
-        shares = info.get('sharesOutstanding', 0)
+    discount_rate = np.array([a['discount_rate'] for a in assumptions])
+    perpetual_growth = np.array([a['perpetual_growth'] for a in assumptions])
+    pv_multiplier = np.array([a['_pv_multiplier'] for a in assumptions])
 
-        if not shares:
-            result.update({"Verdict": "No Share Data", "Intrinsic Value": "N/A", "Margin of Safety": "N/A"})
-            return result
-            
-        equity_value = enterprise_value - total_debt + cash_equiv
-        intrinsic_per_share = equity_value / shares
-        margin = (1 - (current_price / intrinsic_per_share)) * 100 if intrinsic_per_share > 0 else -100
-        verdict = "Undervalued" if current_price < intrinsic_per_share else "Overvalued"
-
-        result.update({
-            "Intrinsic Value": f"${intrinsic_per_share:,.2f}",
-            "Margin of Safety": f"{margin:.2f}%",
-            "Verdict": verdict
-        })
-        return result
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intrinsic = dcf_kernel(fcf, debt, cash, shares, pv_multiplier)
+        margin = np.where(intrinsic > 0, (1 - price / intrinsic) * 100, -100.0)
 
-    except Exception as e:
-        return {"Ticker": ticker, "Verdict": f"Error: {e}"}
+    fetched = np.array([v is None for v in fetch_verdicts], dtype=bool)
+    negative_terminal = fetched & (discount_rate <= perpetual_growth)
+    no_shares = fetched & ~negative_terminal & (shares == 0)
+    valued = fetched & ~negative_terminal & ~no_shares
+
+    verdict = np.select(
+        [~fetched, negative_terminal, no_shares, price < intrinsic],
+        [np.array(fetch_verdicts, dtype=object), "Negative Terminal Value", "No Share Data", "Undervalued"],
+        default="Overvalued"
+    )
+
+    return pd.DataFrame({
+        "Ticker": tickers,
+        "Tier": [
+            t.split(':')[-1].strip() if f or v == NEGATIVE_FCF_VERDICT else np.nan
+            for t, f, v in zip(tier_names, fetched, fetch_verdicts)
+        ],
+        "Current Price": price,
+        "P/E Ratio": columns["P/E Ratio"],
+        "Intrinsic Value": np.where(valued, intrinsic, np.nan),
+        "Margin of Safety": np.where(valued, margin, np.nan),
+        "Verdict": verdict
+    })
+
+DISPLAY_FORMATTERS = {
+    "Current Price": "${:,.2f}".format,
+    "Intrinsic Value": "${:,.2f}".format,
+    "Margin of Safety": "{:.2f}%".format
+}
+
+def analyze_tickers(tickers):
+    tickers = sorted({ticker.upper() for ticker in tickers})
+    if not tickers:
+        return value_companies([])
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(tickers))) as executor:
+        fundamentals = list(executor.map(fetch_fundamentals, tickers))
+    return value_companies(fundamentals)
 
 if __name__ == "__main__":
     pd.set_option('display.max_rows', None)
-    analysis_results = [analyze_ticker(ticker) for ticker in sorted(list(set(WATCHLIST)))]
-    final_df = pd.DataFrame(analysis_results)
+    final_df = analyze_tickers(WATCHLIST)
     
     print("\n--- Final Investment Filter ---")
-    print(final_df.to_string(index=False))
+    print(final_df.to_string(index=False, formatters=DISPLAY_FORMATTERS, na_rep="N/A"))
+    print(f"\n{cache.stats()}")
     print("\nDisclaimer: This is a quantitative filter, not financial advice. Judgment is required.")